@@ -51,7 +51,7 @@ def get_constant_time_profile() -> list[TemporalProfile]:
 
 def export_icon_oem(
     inv: Inventory,
-    icon_grid_file: PathLike,
+    icon_grid_file: PathLike | ICONGrid,
     output_dir: PathLike,
     group_dict: dict[str, list[str]] = {},
     country_resolution: str = "10m",
@@ -59,6 +59,7 @@ def export_icon_oem(
     year: int | None = None,
     nc_attributes: dict[str, str] = DEFAULT_NC_ATTRIBUTES,
     substances: list[str] | None = None,
+    compression: bool = True,
 ):
     """Export to a netcdf file for ICON OEM.
 
@@ -85,6 +86,7 @@ def export_icon_oem(
     OEM units  `kg/m2/s` .
     The grid cell area given in the icon grid file is used for this conversion,
     and 365.25 days per year. 
+    The emissions are computed in double precision but written as float32.
 
     Temporal profiles are adapted to the different countries present in the data.
     Shifts for local time are applied to the countries individually.
@@ -94,6 +96,8 @@ def export_icon_oem(
 
     :arg inv: The inventory to export.
     :arg icon_grid_file: The icon grid file.
+        If you already loaded the :py:class:`emiproc.grids.ICONGrid`
+        you can pass it instead, so that it is not created again.
     :arg output_dir: The output directory.
     :arg group_dict: If you groupped some categories, you can optionally
         add the groupping in the metadata.
@@ -107,10 +111,17 @@ def export_icon_oem(
         :py:class:`~emiproc.exports.icon.TemporalProfilesTypes.HOUR_OF_YEAR`
     :arg nc_attributes: The attributes to add to the netcdf file.
     :arg substances: The substances to export. If None, all substances of the inv.
+    :arg compression: Whether to compress the emissions in the output file.
+        Emission fields are mostly zeros and shrink a lot with zlib,
+        which also makes the reading by ICON faster.
 
     """
     logger = logging.getLogger("emiproc.export_icon_oem")
 
+    icon_grid = None
+    if isinstance(icon_grid_file, ICONGrid):
+        icon_grid = icon_grid_file
+        icon_grid_file = icon_grid.dataset_path
     icon_grid_file = Path(icon_grid_file)
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
@@ -118,17 +129,24 @@ def export_icon_oem(
 
     ds_out: xr.Dataset = xr.load_dataset(icon_grid_file)
     time_profiles: dict[str, list[TemporalProfile]] = {}
+    time_profiles_indexes: dict[str, int] = {}
     vertical_profiles: dict[str, VerticalProfile] = {}
+    emission_vars: dict[str, xr.DataArray] = {}
 
-    for categorie, sub in inv._gdf_columns:
-        if substances is not None and sub not in substances:
-            continue
-        name = f"{categorie}-{sub}"
+    columns = [
+        (categorie, sub)
+        for categorie, sub in inv._gdf_columns
+        if substances is None or sub in substances
+    ]
+    # Convert from kg/year to kg/m2/s, all the columns at once
+    all_emissions = (
+        inv.gdf[columns].to_numpy()
+        / ds_out["cell_area"].to_numpy()[:, np.newaxis]
+        / SEC_PER_YR
+    )
 
-        # Convert from kg/year to kg/m2/s
-        emissions = (
-            inv.gdf[(categorie, sub)].to_numpy() / ds_out["cell_area"] / SEC_PER_YR
-        )
+    for i, (categorie, sub) in enumerate(columns):
+        name = f"{categorie}-{sub}"
 
         attributes = {
             "units": "kg/m2/s",
@@ -139,9 +157,9 @@ def export_icon_oem(
         if group_dict:
             attributes["group_made_from"] = f"{group_dict[categorie]}"
 
-        emission_with_metadata = emissions.assign_attrs(attributes)
-
-        ds_out = ds_out.assign({name: emission_with_metadata})
+        emission_vars[name] = xr.DataArray(
+            all_emissions[:, i], dims=ds_out["cell_area"].dims, attrs=attributes
+        )
 
         if inv.v_profiles is not None:
             profile_index = get_desired_profile_index(
@@ -155,6 +173,10 @@ def export_icon_oem(
                 inv.t_profiles_indexes, cat=categorie, sub=sub
             )
             time_profiles[name] = inv.t_profiles_groups[profile_index]
+            time_profiles_indexes[name] = profile_index
+
+    # Adding all the variables at once avoids copying the dataset for each
+    ds_out = ds_out.assign(emission_vars)
 
     # Find the proper country codes
     mask_file = (
@@ -163,7 +185,8 @@ def export_icon_oem(
     if mask_file.is_file():
         country_mask = np.load(mask_file)
     else:
-        icon_grid = ICONGrid(icon_grid_file)
+        if icon_grid is None:
+            icon_grid = ICONGrid(icon_grid_file)
         country_mask = compute_country_mask(icon_grid, country_resolution)
         np.save(mask_file, country_mask)
 
@@ -184,6 +207,7 @@ def export_icon_oem(
         make_icon_time_profiles(
             time_profiles=time_profiles,
             countries_shifts=countries_shifts,
+            time_profiles_indexes=time_profiles_indexes,
             profiles_type=temporal_profiles_type,
             year=year,
             out_dir=output_dir,
@@ -210,7 +234,20 @@ def export_icon_oem(
         }
     )
     # Save the emissions
-    ds_out.to_netcdf(output_dir / "oem_gridded_emissions.nc")
+    # Single precision is enough for the emissions, and halves the file size
+    encoding = {name: {"dtype": "float32"} for name in emission_vars}
+    if compression:
+        # One chunk per variable, as ICON reads the full field at once
+        for name in list(emission_vars) + ["country_ids"]:
+            encoding.setdefault(name, {}).update(
+                {
+                    "zlib": True,
+                    "complevel": 4,
+                    "shuffle": True,
+                    "chunksizes": ds_out["cell_area"].shape,
+                }
+            )
+    ds_out.to_netcdf(output_dir / "oem_gridded_emissions.nc", encoding=encoding)
 
     logger.info(f"Exported inventory to {output_dir}.")
 
@@ -222,6 +259,7 @@ def make_icon_time_profiles(
     year: int | None = None,
     out_dir: PathLike | None = None,
     nc_attrs: dict[str, str] = DEFAULT_NC_ATTRIBUTES,
+    time_profiles_indexes: dict[str, int] | None = None,
 ) -> dict[str, xr.Dataset]:
     """Make the profiles in the icon format.
 
@@ -234,6 +272,10 @@ def make_icon_time_profiles(
     :arg year: Used for the HOUR_OF_YEAR option.
     :arg out_dir: The directory where to save the files.
         If None, the files are not saved.
+    :arg time_profiles_indexes: The index of the profiles of each variable.
+        Variables with the same index share their hour of year factors,
+        which are then computed only once.
+        If None, the factors are computed for each variable.
 
     .. note::
         OEM can differentiate profiles based on the grid cell.
@@ -266,6 +308,10 @@ def make_icon_time_profiles(
         "long_name": f"{profile_name} scaling factors for {var_name}",
     }
 
+    # Many variables share the same profiles, the hour of year
+    # scaling factors are computed only once for them
+    hourofyear_of_profiles: dict[int | str, np.ndarray] = {}
+
     for key in time_profiles:
         if profiles_type == TemporalProfilesTypes.THREE_CYCLES:
             for profile in time_profiles[key]:
@@ -306,19 +352,28 @@ def make_icon_time_profiles(
             if year is None:
                 raise ValueError("You must provide a year for the HOUR_OF_YEAR option.")
 
-            # Use the shifts in the intervals
-            dt_start = datetime(year, 1, 1, hour=0) - timedelta(hours=max_shift)
-            dt_end = datetime(year, 12, 31, hour=23) + timedelta(hours=max_shift + 1)
+            profiles_id = (
+                key if time_profiles_indexes is None else time_profiles_indexes[key]
+            )
+            if profiles_id not in hourofyear_of_profiles:
+                # Use the shifts in the intervals
+                dt_start = datetime(year, 1, 1, hour=0) - timedelta(hours=max_shift)
+                dt_end = datetime(year, 12, 31, hour=23) + timedelta(
+                    hours=max_shift + 1
+                )
 
-            ts = create_scaling_factors_time_serie(dt_start, dt_end, time_profiles[key])
+                ts = create_scaling_factors_time_serie(
+                    dt_start, dt_end, time_profiles[key]
+                )
 
-            concatenated_profiles = np.asarray(
-                [
-                    # Start around the shift and end
-                    ts.to_numpy()[max_shift + shift : -max_shift + shift - 1]
-                    for country, shift in zip(countries, shifts)
-                ]
-            )
+                hourofyear_of_profiles[profiles_id] = np.asarray(
+                    [
+                        # Start around the shift and end
+                        ts.to_numpy()[max_shift + shift : -max_shift + shift - 1]
+                        for country, shift in zip(countries, shifts)
+                    ]
+                )
+            concatenated_profiles = hourofyear_of_profiles[profiles_id]
 
             # Apply the shift for each contry
             hourofyear[key] = xr.DataArray(
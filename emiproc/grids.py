@@ -5,6 +5,8 @@ grids used in different emissions inventories.
 """
 from __future__ import annotations
 from functools import cache, cached_property
+from os import PathLike
+from pathlib import Path
 from typing import Iterable
 import numpy as np
 import xarray as xr
@@ -13,6 +15,7 @@ import pyproj
 import math
 
 from netCDF4 import Dataset
+import shapely
 from shapely.geometry import Polygon, Point, box, LineString, MultiPolygon
 from shapely.ops import split
 
@@ -76,6 +79,9 @@ class Grid:
         The clunky return type is necessary because the corners
         are transformed after by cartopy.crs.CRS.transform_points.
 
+        Implementations should also accept arrays of indices (of same shape)
+        for i and j, in which case the returned arrays have shape (4, n).
+
         Parameters
         ----------
         i : int
@@ -92,12 +98,17 @@ class Grid:
 
     @cached_property
     def cells_as_polylist(self) -> list[Polygon]:
-        """Return all the cells as a list of polygons."""
-        return [
-            Polygon(zip(*self.cell_corners(i, j)))
-            for i in range(self.nx)
-            for j in range(self.ny)
-        ]
+        """Return all the cells as a list of polygons.
+
+        The cells are ordered with i as the outer and j as the inner index.
+        The polygons are created at once from the corners of all the cells,
+        which requires :py:meth:`cell_corners` to accept arrays of indices.
+        """
+        i, j = np.meshgrid(np.arange(self.nx), np.arange(self.ny), indexing="ij")
+        corners_x, corners_y = self.cell_corners(i.ravel(), j.ravel())
+        # Shape (n_cells, n_corners, 2), the rings are closed by shapely
+        coords = np.stack([corners_x.T, corners_y.T], axis=-1)
+        return shapely.polygons(coords).tolist()
 
     @cached_property
     def cell_areas(self) -> Iterable[float]:
@@ -306,13 +317,24 @@ class EDGARGrid(Grid):
     The grid is similar to the TNO grid.
     """
 
-    def __init__(self, dataset_path, name="EDGAR"):
+    def __init__(
+        self,
+        dataset_path,
+        name="EDGAR",
+        lon: np.ndarray | None = None,
+        lat: np.ndarray | None = None,
+    ):
         """Open the netcdf-dataset and read the relevant grid information.
 
         Parameters
         ----------
         dataset_path : str
         name : str, optional
+        lon : np.array(dtype=float), optional
+            Centers of the cells in longitude, to use instead of the ones
+            of the file, e.g. after the inventory was cropped.
+        lat : np.array(dtype=float), optional
+            Centers of the cells in latitude, same as `lon`.
         """
         self.dataset_path = dataset_path
 
@@ -320,13 +342,18 @@ class EDGARGrid(Grid):
             self.lon_var = np.array(dataset["lon"][:])
             self.lat_var = np.array(dataset["lat"][:])
 
+        # The lat/lon values are the cell-centers
+        self.dx = (self.lon_var[-1] - self.lon_var[0]) / (len(self.lon_var) - 1)
+        self.dy = (self.lat_var[-1] - self.lat_var[0]) / (len(self.lat_var) - 1)
+
+        if lon is not None:
+            self.lon_var = np.asarray(lon)
+        if lat is not None:
+            self.lat_var = np.asarray(lat)
+
         self.nx = len(self.lon_var)
         self.ny = len(self.lat_var)
 
-        # The lat/lon values are the cell-centers
-        self.dx = (self.lon_var[-1] - self.lon_var[0]) / (self.nx - 1)
-        self.dy = (self.lat_var[-1] - self.lat_var[0]) / (self.ny - 1)
-
         # Compute the cell corners
         x = self.lon_var
         y = self.lat_var
@@ -387,7 +414,7 @@ class EDGARGrid(Grid):
         lats_c = np.append(self.cell_y[1], self.cell_y[0, -1])
         lats_c = np.deg2rad(lats_c)
 
-        dlon = 2 * np.pi / self.nx
+        dlon = np.deg2rad(abs(self.dx))
         areas = (R_EARTH * R_EARTH * dlon * np.abs(np.sin(lats_c[:-1]) - np.sin(lats_c[1:])))
         areas = np.broadcast_to(areas[np.newaxis, :], (self.nx, self.ny))
 
@@ -759,13 +786,20 @@ class ICONGrid(Grid):
     The grid file contains variables like midpoint coordinates etc as a fct of the index.
     """
 
-    def __init__(self, dataset_path, name="ICON"):
+    def __init__(
+        self, dataset_path, name="ICON", cache_file: PathLike | None = None
+    ):
         """Open the netcdf-dataset and read the relevant grid information.
 
         Parameters
         ----------
         dataset_path : str
         name : str, optional
+        cache_file : str, optional
+            A npz file where the geometries of the cells are saved.
+            Splitting the cells at the antimeridian is expensive, so if
+            the file exists and was made from the same grid file,
+            the geometries are read from it instead.
         """
         self.dataset_path = dataset_path
 
@@ -780,19 +814,31 @@ class ICONGrid(Grid):
 
         self.ncell = len(self.clat_var)
 
-        # Initiate a list of polygons, which is updated whenever the polygon of a cell
-        # is called for the first time
-        self.polygons = [
-            Polygon(zip(*self._cell_corners(i))) for i in range(self.ncell)
-        ]
+        # Create the triangles of all the cells at once
+        # Shape (ncell, 3 vertices, 2 coordinates), vertices index start at 1
+        vertices = self.vertex_of_cell.T - 1
+        coords = np.stack(
+            [np.asarray(self.vlon)[vertices], np.asarray(self.vlat)[vertices]],
+            axis=-1,
+        )
+        self.polygons = shapely.polygons(coords).tolist()
 
         # Create a geopandas df
         # ICON_FILE_CRS = 6422
         # Apparently the crs of icon is not what is written in the nc file.
         ICON_FILE_CRS = WGS84
 
-        self.gdf = gpd.GeoDataFrame(geometry=self.polygons, crs=ICON_FILE_CRS)
-        self.process_overlap_antimeridian()
+        geometries = None
+        if cache_file is not None:
+            cache_file = Path(cache_file).with_suffix(".npz")
+            geometries = self._load_geometries(cache_file)
+        if geometries is None:
+            self.gdf = gpd.GeoDataFrame(geometry=self.polygons, crs=ICON_FILE_CRS)
+            self.process_overlap_antimeridian()
+            if cache_file is not None:
+                self._save_geometries(cache_file)
+        else:
+            self.gdf = gpd.GeoDataFrame(geometry=geometries, crs=ICON_FILE_CRS)
 
         # Consider the ICON-grid as a 1-dimensional grid where ny=1
         self.nx = self.ncell
@@ -800,6 +846,34 @@ class ICONGrid(Grid):
 
         super().__init__(name, crs=ICON_FILE_CRS)
 
+    def _grid_file_key(self) -> np.ndarray:
+        """Identify the version of the grid file the geometries come from."""
+        return np.array([Path(self.dataset_path).stat().st_mtime_ns, self.ncell])
+
+    def _load_geometries(self, cache_file: Path) -> np.ndarray | None:
+        """Load the geometries of the cells, None if the cache is not valid."""
+        if not cache_file.is_file():
+            return None
+        with np.load(cache_file) as cache:
+            if not np.array_equal(cache["key"], self._grid_file_key()):
+                return None
+            # All the wkb are concatenated, offsets mark the start of each
+            wkb, offsets = cache["wkb"].tobytes(), cache["offsets"]
+        return shapely.from_wkb(
+            [wkb[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+        )
+
+    def _save_geometries(self, cache_file: Path):
+        """Save the geometries of the cells as wkb."""
+        wkbs = shapely.to_wkb(self.gdf.geometry.to_numpy())
+        offsets = np.cumsum([0] + [len(wkb) for wkb in wkbs])
+        np.savez(
+            cache_file,
+            key=self._grid_file_key(),
+            wkb=np.frombuffer(b"".join(wkbs), dtype=np.uint8),
+            offsets=offsets,
+        )
+
     def _cell_corners(self, n):
         """Internal cell corners"""
 
@@ -825,6 +899,12 @@ class ICONGrid(Grid):
 
         return self.gdf.geometry.iloc[n].exterior.coords.xy
 
+    @cached_property
+    def cells_as_polylist(self) -> list[Polygon]:
+        """Return all the cells as a list of polygons."""
+        # The corners are taken from the gdf, one cell at a time
+        return [Polygon(zip(*self.cell_corners(n, 0))) for n in range(self.nx)]
+
     def gridcell_areas(self):
         """Calculate 2D array of the areas (m^2) of a regular rectangular grid
         on earth.
@@ -854,61 +934,58 @@ class ICONGrid(Grid):
                 lons += 360
             return Polygon([*zip(lons, lats)])
 
-        def detect_antimeridian_poly(poly):
-            coords = poly.exterior.coords
-            lon1, lon2, lon3 = coords[0][0], coords[1][0], coords[2][0]
-            coords_cond1 = [list(c) for c in coords[:-1]]
-
-            cond1 = np.count_nonzero(np.array([lon1, lon2, lon3]) > 180.0 - 1e-5) == 2
-            if cond1:
-                if lon1 < 0:
-                    coords_cond1[1][0] = lon2 - 360
-                    coords_cond1[2][0] = lon3 - 360
-                elif lon2 < 0:
-                    coords_cond1[0][0] = lon1 - 360
-                    coords_cond1[2][0] = lon3 - 360
-                elif lon3 < 0:
-                    coords_cond1[0][0] = lon1 - 360
-                    coords_cond1[1][0] = lon2 - 360
-
-            vmin = -140
-            vmax = 140
-            lon1, lon2, lon3 = (
-                coords_cond1[0][0],
-                coords_cond1[1][0],
-                coords_cond1[2][0],
-            )
-            cond2 = (
-                (lon1 > vmax or lon1 < vmin)
-                or (lon2 > vmax or lon2 < vmin)
-                or (lon3 > vmax or lon3 < vmin)
-            )
-            coords_cond2 = [list(c) for c in coords_cond1]
-
-            if cond2:
-
-                if lon1 * lon2 < 0 and lon1 * lon3 < 0:
-                    coords_cond2[0][0] = lon1 - math.copysign(1, lon1) * 360
-
-                elif lon2 * lon1 < 0 and lon2 * lon3 < 0:
-                    coords_cond2[1][0] = lon2 - math.copysign(1, lon2) * 360
-
-                elif lon3 * lon1 < 0 and lon3 * lon2 < 0:
-                    coords_cond2[2][0] = lon3 - math.copysign(1, lon3) * 360
-
-            return Polygon(coords_cond2)
-
         crs = pyproj.CRS.from_epsg(WGS84)
         bounds = crs.area_of_use.bounds
 
         xx_bounds, yy_bounds = box(*bounds).exterior.coords.xy
         coords_bounds = [(x, y) for x, y in zip(xx_bounds, yy_bounds)]
         bounds_line = LineString(coords_bounds)
+        # Speeds up the intersection tests with all the cells
+        shapely.prepare(bounds_line)
+
+        # Bring the vertices of the triangles crossing the antimeridian
+        # on the same side, all the cells at once with shape (ncell, 3)
+        geometries = self.gdf.geometry.to_numpy()
+        coords = shapely.get_coordinates(geometries).reshape(len(geometries), -1, 2)
+        lons = coords[:, :3, 0].copy()
+        lats = coords[:, :3, 1]
+
+        # Two vertices on the antimeridian: move them next to the third one
+        on_antimeridian = np.count_nonzero(lons > 180.0 - 1e-5, axis=1) == 2
+        negative = lons < 0
+        shift = (
+            (on_antimeridian & np.any(negative, axis=1))[:, np.newaxis]
+            & (np.arange(3) != np.argmax(negative, axis=1)[:, np.newaxis])
+        )
+        lons[shift] -= 360
+
+        # A vertex far from the meridian 0 and on the other side than the two
+        # others is moved on their side
+        vmin = -140
+        vmax = 140
+        far = np.any((lons > vmax) | (lons < vmin), axis=1)
+        lon1, lon2, lon3 = lons.T
+        alone = np.stack(
+            [
+                (lon1 * lon2 < 0) & (lon1 * lon3 < 0),
+                (lon2 * lon1 < 0) & (lon2 * lon3 < 0),
+                (lon3 * lon1 < 0) & (lon3 * lon2 < 0),
+            ],
+            axis=1,
+        )
+        shift = far[:, np.newaxis] & alone
+        lons[shift] -= np.copysign(360, lons[shift])
 
+        polygons = shapely.polygons(np.stack([lons, lats], axis=-1))
         self.gdf = self.gdf.set_geometry(
-            self.gdf.geometry.apply(lambda poly: detect_antimeridian_poly(poly))
+            gpd.GeoSeries(
+                polygons,
+                index=self.gdf.index,
+                crs=self.gdf.crs,
+            )
         )
-        gdf_inter = self.gdf.loc[self.gdf.intersects(bounds_line)]
+
+        gdf_inter = self.gdf.loc[shapely.intersects(bounds_line, polygons)]
         gdf_inter = gdf_inter.set_geometry(
             gdf_inter.geometry.apply(
                 lambda poly: MultiPolygon(split(poly, bounds_line))
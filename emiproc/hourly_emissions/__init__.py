@@ -1,12 +1,16 @@
 """Legacy file from v1"""
 import time
 import datetime
+import collections
+import itertools
 import os
 
 import numpy as np
 
-from netCDF4 import Dataset
+from netCDF4 import Dataset, date2num
 from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 
 
 def daterange(start_date, end_date):
@@ -54,17 +58,20 @@ def country_id_mapping(country_codes, grid):
         Contains at each gridpoint the position of the EMEP code (from grid)
         in country_codes
     """
-    # There are 134 different EMEP country-codes, this fits in an uint8
-    res = np.empty(shape=grid.shape, dtype=np.uint8)
-    for i in range(grid.shape[0]):
-        for j in range(grid.shape[1]):
-            location = np.where(country_codes[:] == grid[i, j])
-            try:
-                res[i, j] = location[0][0]
-            except IndexError:
-                raise IndexError("Country-ID not found")
+    country_codes = np.asarray(country_codes)
+    grid = np.asarray(grid)
+
+    # Sort the codes once and look up all the gridpoints at the same time
+    order = np.argsort(country_codes, kind="stable")
+    sorted_codes = country_codes[order]
+    idx = np.searchsorted(sorted_codes, grid)
+    # Codes larger than all the known ones point after the end of the array
+    idx = np.minimum(idx, len(sorted_codes) - 1)
+    if not np.all(sorted_codes[idx] == grid):
+        raise IndexError("Country-ID not found")
 
-    return res
+    # There are 134 different EMEP country-codes, this fits in an uint8
+    return order[idx].astype(np.uint8).reshape(grid.shape)
 
 
 def extract_to_grid(grid_to_index, country_vals):
@@ -95,11 +102,7 @@ def extract_to_grid(grid_to_index, country_vals):
         >>> res[i,j] == y[x[i,j]]
         True
     """
-    res = np.empty(shape=grid_to_index.shape, dtype=np.float32)
-    for i in range(grid_to_index.shape[0]):
-        for j in range(grid_to_index.shape[1]):
-            res[i, j] = country_vals[grid_to_index[i, j]]
-    return res
+    return np.asarray(country_vals, dtype=np.float32)[grid_to_index]
 
 
 class CountryToGridTranslator:
@@ -121,34 +124,75 @@ class CountryToGridTranslator:
         return extract_to_grid(self.grid_to_index, x)
 
 
-def write_metadata(outfile, emi_file, ver_file, variables, model):
+def extract_metadata(emi_path, ver_path):
+    """Extract from the input files what write_metadata() needs.
+
+    Reading it once allows to write many output files without opening the
+    input datasets again.
+
+    Parameters
+    ----------
+    emi_path : str
+        Path to dataset containing dimensions & variables "rlon", "rlat"
+    ver_path : str
+        Path to dataset containing the dimension "level" and variables
+        "layer_bot", "layer_mid", "layer_top"
+
+    Returns
+    -------
+    dict
+        -   'coords' : dict(str: dict)
+                For "rlon" and "rlat", the 'datatype', 'dimensions',
+                'attributes' and 'values' of the variable in emi_path.
+        -   'level' : np.array(shape=(level,))
+                Mid height of the levels.
+        -   'level_bnds' : np.array(shape=(2, level))
+                Bottom and top heights of the levels.
+    """
+    with Dataset(emi_path) as emi_file, Dataset(ver_path) as ver_file:
+        coords = {
+            varname: {
+                "datatype": emi_file[varname].datatype,
+                "dimensions": emi_file[varname].dimensions,
+                "attributes": emi_file[varname].__dict__,
+                "values": np.array(emi_file[varname][:]),
+            }
+            for varname in ["rlon", "rlat"]
+        }
+        level = np.array(ver_file["layer_mid"][:])
+        level_bnds = np.array([ver_file["layer_bot"][:], ver_file["layer_top"][:]])
+
+    return {"coords": coords, "level": level, "level_bnds": level_bnds}
+
+
+def write_metadata(outfile, metadata, variables, model):
     """Write the metadata of the outfile.
 
-    Determine rlat, rlon from emi_file, levels from ver_file.
+    Determine rlat, rlon and levels from metadata.
 
     Create "time", "rlon", "rlat", "bnds", "level" dimensions.
 
-    Create "rlon", "rlat" variables from emi_file.
+    Create "rlon", "rlat" variables from metadata.
 
     Create an emtpy variable with dimensions ("time", "level", "rlat", "rlon")
-    for element of variables.
+    for element of variables. Each time step of a variable is stored in a
+    single chunk, as it is written at once.
 
     Parameters
     ----------
     outfile : netCDF4.Dataset
         Opened with 'w'-option. Where the data is written to.
-    emi_file : netCDF4.Dataset
-        Containing dimensions "rlon", "rlat"
-    ver_file : netCDF4.Dataset
-        Containing the variable "level_bnds" and varaible & dimension "level"
+    metadata : dict
+        As returned by extract_metadata()
     variables : list(str)
         List of variable-names to be created
     model : str
         'cosmo-ghg' or 'cosmo-art'
     """
-    rlat = emi_file.dimensions["rlat"].size
-    rlon = emi_file.dimensions["rlon"].size
-    level = ver_file.dimensions["level"].size
+    coords = metadata["coords"]
+    rlat = len(coords["rlat"]["values"])
+    rlon = len(coords["rlon"]["values"])
+    level = len(metadata["level"])
 
     outfile.createDimension("time")
     outfile.createDimension("rlon", rlon)
@@ -193,33 +237,27 @@ def write_metadata(outfile, emi_file, ver_file, variables, model):
 
 
     
-    var_srcfile = [
-        ("rlon", emi_file),
-        ("rlat", emi_file),
-    ]
-
-    for varname, src_file in var_srcfile:
+    for varname, coord in coords.items():
         outfile.createVariable(
             varname=varname,
-            datatype=src_file[varname].datatype,
-            dimensions=src_file[varname].dimensions,
+            datatype=coord["datatype"],
+            dimensions=coord["dimensions"],
         )
-        outfile[varname].setncatts(src_file[varname].__dict__)
+        outfile[varname].setncatts(coord["attributes"])
         outfile[varname].grid_mapping = "rotated_pole"
 
     outfile["time"][:] = 0
-    outfile["level"][:] = ver_file["layer_mid"][:]
-    outfile["level_bnds"][:] = np.array(
-        [ver_file["layer_bot"][:], ver_file["layer_top"][:]]
-    )
-    outfile["rlat"][:] = emi_file["rlat"][:]
-    outfile["rlon"][:] = emi_file["rlon"][:]
+    outfile["level"][:] = metadata["level"]
+    outfile["level_bnds"][:] = metadata["level_bnds"]
+    outfile["rlat"][:] = coords["rlat"]["values"]
+    outfile["rlon"][:] = coords["rlon"]["values"]
 
     for varname in variables:
         outfile.createVariable(
             varname=varname,
             datatype="float32",
             dimensions=("time", "level", "rlat", "rlon"),
+            chunksizes=(1, level, rlat, rlon),
         )
         if model == 'cosmo-ghg':
             outfile[varname].units = "kg m-2 s-1"
@@ -235,6 +273,11 @@ def extract_matrices(infile, var_list, indices, transform=None):
 
     If transform is not None, it is applied to the extracted array.
 
+    Each variable is read once, even if it appears multiple times in
+    var_list. The arrays are stacked in a single float32 array, the
+    precision of the output files, such that the computations are not done
+    in double precision.
+
     Parameters
     ----------
     infile : str
@@ -247,40 +290,43 @@ def extract_matrices(infile, var_list, indices, transform=None):
 
     Returns
     -------
-    dict()
-        Return a dictionary of varname : np.array() pairs.
+    tuple(dict(str: int), np.array(dtype=np.float32))
+        Return a dictionary mapping the varnames to their row in the
+        stacked array, and the stacked array, of shape
+        (n_variables, *infile[var][indices].shape).
 
-        >>> mats = extract_matrices(if, ['myvar'], np.s_[0, :])
-        >>> np.allclose(mats['myvar'], if['myvar'][0, :], rtol=0, atol=0)
+        >>> rows, mats = extract_matrices(if, [['myvar']], np.s_[0, :])
+        >>> np.allclose(mats[rows['myvar']], if['myvar'][0, :])
         True
-        >>> mats2 = extract_matrics(if, ['myvar'], np.s_[0, :], np.max)
-        >>> mats2['myvar'] == np.max(if['myvar'][0, :])
+        >>> rows, mats2 = extract_matrics(if, [['myvar']], np.s_[0, :], np.max)
+        >>> mats2[rows['myvar']] == np.float32(np.max(if['myvar'][0, :]))
         True
     """
-    res = dict()
+    # Unique variables, in the order they first appear
+    names = list(dict.fromkeys(itertools.chain(*var_list)))
 
     with Dataset(infile) as data:
         if transform is None:
-            for subvar_list in var_list:
-                for var in subvar_list:
-                    res[var] = np.array(data[var][indices])
+            mats = [data[var][indices] for var in names]
         else:
-            for subvar_list in var_list:
-                for var in subvar_list:
-                    res[var] = np.array(transform(data[var][indices]))
+            mats = [transform(data[var][indices]) for var in names]
 
-    return res
+    rows = {var: i for i, var in enumerate(names)}
+    return rows, np.array(mats, dtype=np.float32)
 
 
-def process_day(date, path_template, lists, matrices, datasets, model):
+def process_day(
+    date, path_template, lists, matrices, metadata, model, daily_files=False
+):
     """Process one day of emissions, resulting in 24 hour-files.
 
     Loop over all hours of the day, create one file for each hour.
+    If daily_files is True, a single file with 24 time steps is created
+    for the day instead.
 
     For each file, the netcdf-file is created with the name specified by
     name_template. The metadata is written by write_metadata() using
-    information from datasets (possible bottleneck as all processes read from
-    the same netcdf files).
+    the information extracted once by extract_metadata().
 
     Then, for each variable it's values at all points are computed using data
     from the matrices. The variables are specified in lists.
@@ -296,47 +342,49 @@ def process_day(date, path_template, lists, matrices, datasets, model):
         A namedtuple containing the following key/value pairs:
         -   'variables' : list(str)
                 List of all the variable names.
-        -   'cats' : list(str)
-                List of all categories (used as key for matrices.emi_mats).
-        -   'tps' : list(str)
-                List of all temporal profiles (used as key for
-                matrices.hod_mats, matrices.dow_mats, matrices.moy_mats).
+        -   'cats' : list(np.array(dtype=int))
+                List of all categories, as indices along the first axis of
+                matrices.emi_mats.
+        -   'tps' : list(np.array(dtype=int))
+                List of all temporal profiles, as indices along the
+                temporal profile axis of matrices.hod_mats,
+                matrices.dow_mats, matrices.moy_mats.
+                Should have the same shape as cat_list.
+        -   'vps' : list(np.array(dtype=int))
+                List of all vertical profiles, as indices along the first
+                axis of matrices.ver_mats.
+                Should have the same shape as cat_list.
+        -   'factors' : list(np.array(dtype=np.float32))
+                Speciation factor of each category.
                 Should have the same shape as cat_list.
-        -   'vps' : list(str)
-                List of all vertical profiles (used as key for
-                matrices.vp_mats). Should have the same shape as cat_list.
-        -  'contribution_list' : dict
 
     matrices : dict
         A dict containing the actual emission-data and the profiles applied
         to it:
-        -   'emi_mats' : dict(str: np.array)
-                Dict mapping categories to 2D np.arrays containig emission
-                values on the grid. Shape of the arrays: (rlat, rlon).
-        -   'hod_mats' : list(dict(str: np.array)
-                List of 24 dicts mapping temporal profiles to 2D np.arrays
-                containing hour-profile-values for each gridpoint. Shape of the
-                arrays: (rlat, rlon).
-        -   'dow_mats' : dict(str: np.array)
-                Dict mapping temporal profiles to 2D np.arrays containing day-
-                profile-values for each gridpoint. Shape of the arrays:
-                (rlat, rlon).
-        -   'moy_mats' : dict(str: np.array)
-                Dict mapping temporal profiles to 2D np.arrays containing
-                month-profile-values for each gridpoint. Shape of the arrays:
-                (rlat, rlon).
-        -   'ver_mats' : dict(str: np.array)
-                Dict mapping vertical profiles to 1D np.arrays containg
-                vertical profile-values for each level.
-                Shape of the arrays: (7, ).
-    datasets : dict
-        A dict containing paths to netcdf-files with information about the
-        metadata of the produced emissions-file, most importantly rlat, rlon,
-        and levels. See the detailed usage of these datasets in write_metadata
-        -   'emi_path' : str
-                Dataset containing grid information, such as rlat, rlon.
-        -   'ver_path' : str
-                Dataset containing vertical information, such as levels.
+        -   'emi_mats' : np.array
+                Emission values of each category on the grid.
+                Shape: (n_categories, rlat, rlon).
+        -   'hod_mats' : np.array
+                Hour-profile-values of each temporal profile for each
+                gridpoint. Shape: (24, n_temporal_profiles, rlat, rlon).
+        -   'dow_mats' : np.array
+                Day-profile-values of each temporal profile for each
+                gridpoint. Shape: (n_temporal_profiles, rlat, rlon).
+        -   'moy_mats' : np.array
+                Month-profile-values of each temporal profile for each
+                gridpoint. Shape: (n_temporal_profiles, rlat, rlon).
+        -   'ver_mats' : np.array
+                Vertical profile-values of each vertical profile for each
+                level. Shape: (n_vertical_profiles, levels).
+    metadata : dict
+        The metadata of the produced emissions-file, most importantly rlat,
+        rlon, and levels, as returned by extract_metadata().
+    model : str
+        'cosmo-ghg' or 'cosmo-art'
+    daily_files : bool
+        Whether to write one file per day (path_template with '%Y%m%d')
+        with the 24 hours along the time dimension.
+        Default: False (one file per hour)
 
     Returns
     -------
@@ -345,48 +393,128 @@ def process_day(date, path_template, lists, matrices, datasets, model):
     """
     print(date.strftime("Processing %x..."))
 
-    with Dataset(datasets["emi_path"]) as emi, \
-         Dataset(datasets["ver_path"]) as ver:
-        rlat = emi.dimensions["rlat"].size
-        rlon = emi.dimensions["rlon"].size
-        levels = ver.dimensions["level"].size
+    # Summation of the products over the categories, for each level
+    subscripts = "cyx,cyx,cl->lyx"
+
+    # Stack the matrices of all the categories of each variable, such that
+    # the sum over the categories is done in a single operation
+    stacks = []
+    for v in range(len(lists["variables"])):
+        # Identical (category, temporal, vertical) profiles are only computed
+        # once, weighted by the number of times they appear
+        counts = collections.Counter(
+            zip(
+                lists["cats"][v].tolist(),
+                lists["tps"][v].tolist(),
+                lists["vps"][v].tolist(),
+                # Speciation factor, the same for all the occurences of a cat
+                lists["factors"][v].tolist(),
+            )
+        )
+        if not counts:
+            # A variable without categories has no emissions
+            stacks.append(None)
+            continue
+        cats, tps, vps, factors = (np.array(x) for x in zip(*counts))
+        factors = (factors * list(counts.values())).astype(np.float32)
+        emi_stack = matrices["emi_mats"][cats] * factors[:, np.newaxis, np.newaxis]
+        stack = {
+            "tps": tps,
+            # The day and month profiles are the same for all the hours
+            "day": (
+                emi_stack * matrices["dow_mats"][tps] * matrices["moy_mats"][tps]
+            ),
+            # Shape (categories, levels)
+            "ver": matrices["ver_mats"][vps],
+        }
+        # The contraction order only depends on the shapes, so it is
+        # optimized once here instead of at every hour
+        stack["path"] = np.einsum_path(
+            subscripts,
+            stack["day"],
+            matrices["hod_mats"][0, tps],
+            stack["ver"],
+            optimize="optimal",
+        )[0]
+        stacks.append(stack)
+
+    rlat = len(metadata["coords"]["rlat"]["values"])
+    rlon = len(metadata["coords"]["rlon"]["values"])
+    levels = len(metadata["level"])
+
+    def compute_hour(hour, out):
+        """Compute the values of all the variables at the hour in out."""
+        for v in range(len(lists["variables"])):
+            stack = stacks[v]
+            if stack is None:
+                out[v] = 0
+                continue
+            hod_stack = matrices["hod_mats"][hour, stack["tps"]]
+            # Compute emissions, summed over the categories
+            np.einsum(
+                subscripts,
+                stack["day"],
+                hod_stack,
+                stack["ver"],
+                out=out[v],
+                optimize=stack["path"],
+            )
+        return out
+
+    # Two buffers of the values of all the variables: the next hour is
+    # computed in one while the current hour is written from the other one
+    buffers = [
+        np.empty((len(lists["variables"]), levels, rlat, rlon), dtype=np.float32)
+        for _ in range(2)
+    ]
+
+    # numpy releases the GIL, such that the computations run in a thread
+    # while the files are written. The writing itself stays in this thread,
+    # as netCDF4 is not thread safe.
+    with ThreadPoolExecutor(max_workers=1) as executor, ExitStack() as files:
+        next_hour = executor.submit(compute_hour, 0, buffers[0])
+
+        if daily_files:
+            daily_file = files.enter_context(
+                Dataset(date.strftime(path_template), "w")
+            )
+            write_metadata(
+                outfile=daily_file,
+                metadata=metadata,
+                variables=lists["variables"],
+                model=model
+            )
+            times = daily_file["time"]
+            times[:] = date2num(
+                [datetime.datetime.combine(date, datetime.time(h)) for h in range(24)],
+                units=times.units,
+                calendar=times.calendar,
+            )
 
         for hour in range(24):
+            oae_vals = next_hour.result()
+            if hour < 23:
+                next_hour = executor.submit(
+                    compute_hour, hour + 1, buffers[(hour + 1) % 2]
+                )
+
+            if daily_files:
+                for v, var in enumerate(lists["variables"]):
+                    daily_file[var][hour, :] = oae_vals[v]
+                continue
+
             day_hour = datetime.datetime.combine(date, datetime.time(hour))
             of_path = day_hour.strftime(path_template)
             with Dataset(of_path, "w") as of:
                 write_metadata(
                     outfile=of,
-                    emi_file=emi,
-                    ver_file=ver,
+                    metadata=metadata,
                     variables=lists["variables"],
                     model=model
                 )
-
                 for v, var in enumerate(lists["variables"]):
-                    oae_vals = np.zeros((levels, rlat, rlon))
-                    for cat, tp, vp in zip(
-                        lists["cats"][v], lists["tps"][v], lists["vps"][v]
-                    ):
-                        emi_mat = matrices["emi_mats"][cat]
-                        hod_mat = matrices["hod_mats"][hour][tp]
-                        dow_mat = matrices["dow_mats"][tp]
-                        moy_mat = matrices["moy_mats"][tp]
-                        ver_mat = matrices["ver_mats"][vp]
-
-                        # Add dimensions so numpy can broadcast
-                        ver_mat = np.reshape(ver_mat, (levels, 1, 1))
-
-                        # Compute emissions
-                        value = emi_mat * hod_mat * dow_mat * moy_mat * ver_mat
-
-                        # Apply speciation
-                        if lists['contribution_list'] is not None:
-                            value *= lists['contribution_list'][var].get_wildcard(cat)
-
-                        oae_vals += value
                     # Careful, automatic reshaping!
-                    of[var][0, :] = oae_vals
+                    of[var][0, :] = oae_vals[v]
 
     return date
 
@@ -412,7 +540,8 @@ def generate_arguments(
     contribution_list,
     output_path,
     output_prefix,
-    model
+    model,
+    daily_files=False,
 ):
     """Prepare the arguments for process_day() (mainly extract the relevant data
     from netcdf-files) and yield them as tuples.
@@ -456,6 +585,11 @@ def generate_arguments(
     output_prefix : str
         Prefix of the filename of the generated files.
         output_name="emis_" -> output_path/emis_YYYYMMDDHH.nc
+    model : str
+        'cosmo-ghg' or 'cosmo-art'
+    daily_files : bool
+        Write one file per day, output_path/emis_YYYYMMDD.nc, containing
+        the 24 hours instead of one file per hour.
 
     Yields
     ------
@@ -464,7 +598,8 @@ def generate_arguments(
         starting at start_date and ending the day before end_date.
     """
     start = time.time()
-    path_template = os.path.join(output_path, output_prefix + "%Y%m%d%H.nc")
+    date_format = "%Y%m%d" if daily_files else "%Y%m%d%H"
+    path_template = os.path.join(output_path, output_prefix + date_format + ".nc")
 
     with Pool(16) as pool:  # have 32 parallel processes later
         # Create grid-country-mapping
@@ -483,8 +618,8 @@ def generate_arguments(
 
         print("Extracting average emissions and vertical profiles...")
         res_indep = pool.starmap(extract_matrices, args_indep)
-        emi_mats = res_indep[0]
-        ver_mats = res_indep[1]
+        cat_to_idx, emi_mats = res_indep[0]
+        vp_to_idx, ver_mats = res_indep[1]
         print("... finished average emissions and vertical profiles")
 
         # get() blocks until apply_async is finished
@@ -510,25 +645,44 @@ def generate_arguments(
             )
 
         print("Extracting month, day and hour profiles...")
-        # List of dicts (containing 2D arrays) is not ideal for cache
-        # locality (dict of 3D arrays would be better)
         res_dep = pool.starmap(extract_matrices, args_dep)
-        moy_mats = res_dep[0]
-        dow_mats = res_dep[1:8]
-        hod_mats = res_dep[8:]
         print("... finished temporal profiles")
 
+    # Stack the temporal profiles in dense arrays. All were extracted from
+    # the same tplist, so the profiles are on the same rows.
+    tp_to_idx = res_dep[0][0]
+    moy_mats, dow_mats, hod_mats = [
+        np.stack([mats for _, mats in res])
+        for res in (res_dep[:1], res_dep[1:8], res_dep[8:])
+    ]
+
+    # The profiles are indexed by an integer instead of a name
+    def to_indices(names_list, name_to_idx):
+        return [
+            np.array([name_to_idx[name] for name in names], dtype=int)
+            for names in names_list
+        ]
+
+    if contribution_list is None:
+        factors = [np.ones(len(cats), dtype=np.float32) for cats in catlist]
+    else:
+        factors = [
+            np.array(
+                [contribution_list[var].get_wildcard(cat) for cat in cats],
+                dtype=np.float32,
+            )
+            for var, cats in zip(var_list, catlist)
+        ]
+
     lists = {
         "variables": var_list,
-        "cats": catlist,
-        "tps": tplist,
-        "vps": vplist,
-        'contribution_list': contribution_list,
-    }
-    datasets = {
-        "emi_path": emi_path,
-        "ver_path": ver_path,
+        "cats": to_indices(catlist, cat_to_idx),
+        "tps": to_indices(tplist, tp_to_idx),
+        "vps": to_indices(vplist, vp_to_idx),
+        "factors": factors,
     }
+    # Same metadata for all the output files
+    metadata = extract_metadata(emi_path, ver_path)
 
     stop = time.time()
     print("Finished extracting data in " + str(stop - start))
@@ -537,11 +691,13 @@ def generate_arguments(
             "emi_mats": emi_mats,
             "hod_mats": hod_mats,
             "dow_mats": dow_mats[day_date.weekday()],
-            "moy_mats": moy_mats,
+            "moy_mats": moy_mats[0],
             "ver_mats": ver_mats,
         }
 
-        yield (day_date, path_template, lists, matrices, datasets, model)
+        yield (
+            day_date, path_template, lists, matrices, metadata, model, daily_files
+        )
 
 
 
@@ -557,7 +713,8 @@ def main(
     tplist,
     vplist,
     contribution_list,
-    model
+    model,
+    daily_files=False,
 ):
     point1 = time.time()
 
@@ -580,7 +737,8 @@ def main(
         contribution_list=contribution_list,
         output_path=output_path,
         output_prefix=output_name,
-        model=model
+        model=model,
+        daily_files=daily_files,
     )
 
     with Pool(14) as pool:  # 2 weeks in parallel
@@ -1,3 +1,4 @@
+from __future__ import annotations
 from os import PathLike
 from pathlib import Path
 import xarray as xr
@@ -8,7 +9,7 @@ import pyogrio
 
 from emiproc.grids import WGS84, EDGARGrid
 from emiproc.inventories import Inventory
-from emiproc.utilities import SEC_PER_YR
+from emiproc.utilities import SEC_PER_YR, get_bounds_mask
 
 class EDGAR_Inventory(Inventory):
     """The EDGAR inventory.
@@ -19,17 +20,30 @@ class EDGAR_Inventory(Inventory):
     """
     grid: EDGARGrid
 
-    def __init__(self, nc_file_pattern: PathLike, grid_shapefile: PathLike | None = None) -> None:
+    def __init__(
+        self,
+        nc_file_pattern: PathLike,
+        grid_shapefile: PathLike | None = None,
+        bounds: tuple[float, float, float, float] | None = None,
+    ) -> None:
         """Create a EDGAR_Inventory.
 
         The EDGAR directory that contains the original datasets must be structured as ./substance/categories/dataset,
         e.g., ./SF6/NFE/v7.0_FT2021_SF6_*_NFE.0.1x0.1.nc and ./SF6/PRU/v7.0_FT2021_SF6_*_PRU.0.1x0.1.nc
         
         :arg nc_file_pattern: Pattern of files, e.g "EDGAR/SF6/PRU/v7.0_FT2021_SF6_*_PRU.0.1x0.1.nc"
+        :arg grid_shapefile: Optional shapefile with the geometries of the grid cells.
+        :arg bounds: Optional (lon_min, lat_min, lon_max, lat_max) bounds
+            to which the inventory is cropped.
+            The files are read lazily, so only the cells in the bounds are
+            loaded, which saves a lot of memory on the global grid.
         
         """
         super().__init__()
 
+        if bounds is not None and grid_shapefile is not None:
+            raise ValueError("'bounds' cannot be used with a 'grid_shapefile'.")
+
         nc_file_pattern = Path(nc_file_pattern)
 
         self.name = nc_file_pattern.stem
@@ -52,10 +66,24 @@ class EDGAR_Inventory(Inventory):
 
         # Swtich longitude from 0/360 to -180/180
         attributes = ds.lon.attrs
-        ds = ds.assign(lon=(ds.lon + 180) % 360 - 180).sortby('lon')
+        if np.any(ds.lon.values > 180):
+            ds = ds.assign(lon=(ds.lon + 180) % 360 - 180)
+        # Sorting copies the whole dataset, only do it if required
+        if not np.all(np.diff(ds.lon.values) > 0):
+            ds = ds.sortby('lon')
         ds.lon.attrs = attributes
 
-        self.grid = EDGARGrid(list_filepaths[0])
+        if bounds is not None:
+            xmin, ymin, xmax, ymax = bounds
+            ds = ds.isel(
+                lon=get_bounds_mask(ds.lon.values, xmin, xmax),
+                lat=get_bounds_mask(ds.lat.values, ymin, ymax),
+            )
+
+        # The grid uses the same cells as the data
+        self.grid = EDGARGrid(
+            list_filepaths[0], lon=ds.lon.values, lat=ds.lat.values
+        )
 
         if grid_shapefile is None:
             polys = self.grid.cells_as_polylist
@@ -64,9 +92,6 @@ class EDGAR_Inventory(Inventory):
             gdf_geometry = gdf_geometry.to_crs(WGS84)
             polys = gdf_geometry.geometry.values
 
-        # Index in the polygon list (from the gdf) (index start at 1)
-        poly_ind = np.arange(self.grid.nx * self.grid.ny)
-
         self.gdfs = {}
         mapping = {}
         for cat_idx, cat_name in enumerate(categories):
@@ -77,7 +102,9 @@ class EDGAR_Inventory(Inventory):
                     mapping[tuple_idx] = np.zeros(len(polys))
 
                 # Add all the area sources corresponding to that category
-                np.add.at(mapping[tuple_idx], poly_ind, ds[sub_in_nc].data.T.flatten())
+                # The cells are ordered with x outer and y inner, which is
+                # the fortran order of the (y, x) data: a single copy
+                mapping[tuple_idx] += ds[sub_in_nc].data.ravel(order="F")
 
         self.gdf = gpd.GeoDataFrame(
             mapping,
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from os import PathLike
 
 import xarray as xr
@@ -6,7 +8,7 @@ import geopandas as gpd
 
 from emiproc.grids import WGS84, RegularGrid
 from emiproc.inventories import Inventory
-from emiproc.utilities import SEC_PER_YR
+from emiproc.utilities import SEC_PER_YR, get_bounds_mask
 
 
 class GFAS_Inventory(Inventory):
@@ -20,13 +22,29 @@ class GFAS_Inventory(Inventory):
 
     grid: RegularGrid
 
-    def __init__(self, nc_file: PathLike):
+    def __init__(
+        self,
+        nc_file: PathLike,
+        bounds: tuple[float, float, float, float] | None = None,
+    ):
         """Create a GFAS.
         The GFAS directory contains gridded data of forest fires (co2 fluxes)
 
+        :arg nc_file: The GFAS netcdf file.
+        :arg bounds: Optional (xmin, ymin, xmax, ymax) bounds, in the
+            coordinates of the file, to which the inventory is cropped.
+            The data is read lazily, so only the cells in the bounds are
+            loaded from the file.
         """
         super().__init__()
         ds = xr.open_dataset(nc_file)
+
+        if bounds is not None:
+            xmin, ymin, xmax, ymax = bounds
+            ds = ds.isel(
+                longitude=get_bounds_mask(ds.longitude.values, xmin, xmax),
+                latitude=get_bounds_mask(ds.latitude.values, ymin, ymax),
+            )
         categories = ["co2fire", "mami"]
 
         substances_mapping = {
@@ -48,9 +66,6 @@ class GFAS_Inventory(Inventory):
 
         polys = self.grid.cells_as_polylist
 
-        # Index in the polygon list (from the gdf) (index start at 1)
-        poly_ind = np.arange(self.grid.nx * self.grid.ny)
-
         self.gdfs = {}
         mapping = {}
         for cat_idx, cat_name in enumerate(categories):
@@ -60,7 +75,9 @@ class GFAS_Inventory(Inventory):
                     mapping[tuple_idx] = np.zeros(len(polys))
 
                 # Add all the area sources corresponding to that category
-                np.add.at(mapping[tuple_idx], poly_ind, ds[sub_in_nc].data.T.flatten())
+                # The cells are ordered with x outer and y inner, which is
+                # the fortran order of the (y, x) data: a single copy
+                mapping[tuple_idx] += ds[sub_in_nc].data.ravel(order="F")
 
         self.gdf = gpd.GeoDataFrame(
             mapping,
@@ -71,4 +88,4 @@ class GFAS_Inventory(Inventory):
         self.cell_areas = self.grid.cell_areas
 
         # -- Convert to kg/yr
-        self.gdf[list(mapping)] *= SEC_PER_YR * self.cell_areas[:, np.newaxis]
+        self.gdf[list(mapping)] *= SEC_PER_YR * np.asarray(self.cell_areas)[:, np.newaxis]
@@ -5,7 +5,8 @@ from emiproc.grids import LV95, SwissGrid
 from emiproc.inventories import Inventory
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Polygon, Point
+import shapely
+from shapely.geometry import Point
 import numpy as np
 import rasterio
 
@@ -252,18 +253,7 @@ class SwissRasters(Inventory):
             crs=LV95,
             # This vector is same as raster data reshaped using reshape(-1)
             geometry=(
-                [
-                    Polygon(
-                        (
-                            (x, y),
-                            (x, y + self.grid.dy),
-                            (x + self.grid.dx, y + self.grid.dy),
-                            (x + self.grid.dx, y),
-                        )
-                    )
-                    for y in reversed(ys)
-                    for x in xs
-                ]
+                self._raster_cells(xs, ys)
                 if self.requires_grid
                 else np.full(self.grid.nx * self.grid.ny, np.nan)
             ),
@@ -273,15 +263,26 @@ class SwissRasters(Inventory):
         self.gdfs = {}
         self.gdfs["eipwp"] = self.df_eipwp
 
+    def _raster_cells(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return the polygons of the raster cells, with y decreasing first.
+
+        The cells are created at once from the arrays of their corners.
+        """
+        y, x = np.meshgrid(ys[::-1], xs, indexing="ij")
+        x, y = x.ravel(), y.ravel()
+        return shapely.box(x, y, x + self.grid.dx, y + self.grid.dy, ccw=False)
+
     def load_raster(self, raster_file: Path) -> np.ndarray:
         # Load and save as npy fast reading format
-        if raster_file.with_suffix(".npy").exists():
-            inventory_field = np.load(raster_file.with_suffix(".npy"))
+        npy_file = raster_file.with_suffix(".npy")
+        if npy_file.exists():
+            # Memory mapped: pages are read from the disk only when accessed
+            inventory_field = np.load(npy_file, mmap_mode="r")
         else:
             self.logger.info(f"Parsing {raster_file}")
-            src = rasterio.open(raster_file).read(1)
-            np.save(raster_file.with_suffix(".npy"), src)
-            inventory_field = src
+            with rasterio.open(raster_file) as src:
+                inventory_field = src.read(1)
+            np.save(npy_file, inventory_field)
         return inventory_field
 
 
@@ -81,6 +81,7 @@ class TNO_Inventory(Inventory):
             "ch4": "CH4",
             "nmvoc": "VOC",
         },
+        engine: str = "netcdf4",
     ) -> None:
         """Create a TNO_Inventory.
 
@@ -88,6 +89,8 @@ class TNO_Inventory(Inventory):
         :arg substances: A list of substances to load in the inventory.
         :arg substances_mapping: How to mapp the names from the nc files,
             to names for empiproc.
+        :arg engine: The xarray engine used to read the dataset.
+            Depending on your installation, "h5netcdf" can be faster.
         """
         super().__init__()
 
@@ -97,7 +100,7 @@ class TNO_Inventory(Inventory):
 
         self.name = nc_file.stem
 
-        ds = xr.load_dataset(nc_file, engine="netcdf4")
+        ds = xr.load_dataset(nc_file, engine=engine)
 
         self.grid = TNOGrid(nc_file)
 
@@ -180,14 +183,19 @@ class TNO_Inventory(Inventory):
                 {"source": mask_points_this_cat}
             )
 
+            # Area sources of this category
+            mask = (mask_this_category & mask_area_sources).to_numpy()
+            poly_ind_this_cat = poly_ind[mask]
+
             for sub_in_nc, sub_emiproc in substances_mapping.items():
                 tuple_idx = (cat_name, sub_emiproc)
                 if tuple_idx not in mapping:
                     mapping[tuple_idx] = np.zeros(len(polys))
                 # Add all the area sources corresponding to that category
-                mask = mask_this_category & mask_area_sources
-                emissions = ds[sub_in_nc][mask].to_numpy()
-                np.add.at(mapping[tuple_idx], poly_ind[mask], emissions)
+                emissions = ds[sub_in_nc].to_numpy()[mask]
+                mapping[tuple_idx] += np.bincount(
+                    poly_ind_this_cat, weights=emissions, minlength=len(polys)
+                )
                 weights.loc[dict(category=cat_name, substance=sub_in_nc)] += np.sum(
                     emissions
                 )
@@ -13,6 +13,7 @@ import geopandas as gpd
 import pandas as pd
 import numpy as np
 import xarray as xr
+from scipy.sparse import coo_array
 
 from shapely.geometry import Point, MultiPolygon, Polygon
 from emiproc.grids import Grid
@@ -278,23 +279,32 @@ def group_categories(
     out_inv = inv.copy(no_gdfs=True)
 
     if inv.gdf is not None:
+        # Sparse (n_groups, n_columns) matrix of which column goes in which group
+        columns = inv._gdf_columns
+        column_index = {col: i for i, col in enumerate(columns)}
+        groups = []
+        group_indexes, column_indexes = [], []
+        for substance in inv.substances:
+            for group, categories in categories_group.items():
+                for cat in categories:
+                    if (cat, substance) in column_index:
+                        group_indexes.append(len(groups))
+                        column_indexes.append(column_index[(cat, substance)])
+                groups.append((group, substance))
+        grouping_matrix = coo_array(
+            (np.ones(len(group_indexes)), (group_indexes, column_indexes)),
+            shape=(len(groups), len(columns)),
+        ).tocsr()
+        # Sum all the categories containing that substance, in one product
+        grouped = grouping_matrix @ inv.gdf[columns].to_numpy(dtype=float).T
         out_inv.gdf = gpd.GeoDataFrame(
             {
-                # Sum all the categories containing that substance
-                (group, substance): group_sum
-                for substance in inv.substances
-                for group, categories in categories_group.items()
+                group_substance: group_sum
+                for group_substance, group_sum in zip(groups, grouped)
                 # Only add the group if there are some non zero value
-                if np.any(
-                    group_sum := sum(
-                        (
-                            inv.gdf[(cat, substance)]
-                            for cat in categories
-                            if (cat, substance) in inv.gdf
-                        )
-                    )
-                )
+                if np.any(group_sum)
             },
+            index=inv.gdf.index,
             geometry=inv.gdf.geometry,
             crs=inv.crs,
         )
@@ -325,6 +335,32 @@ def group_categories(
 
     # Group the vertical profiles
     # we group only on the gdf, as the gdfs will keep their own profiles
+    group_gdf_profiles(inv, out_inv, categories_group, inv.gdf)
+
+    out_inv.history.append(f"groupped from {inv.categories} to {out_inv.categories}")
+
+    return out_inv
+
+
+def group_gdf_profiles(
+    inv: Inventory,
+    out_inv: Inventory,
+    categories_group: dict[str, list[str]],
+    gdf: pd.DataFrame,
+):
+    """Group the profiles of the categories of the gdf in the groupped inventory.
+
+    The profiles are weightly averaged with the emissions of the categories.
+
+    :arg inv: The inventory before groupping.
+    :arg out_inv: The groupped inventory, in which the new profiles and
+        indexes are set.
+    :arg categories_group: The mapping of the groups, see
+        :py:func:`group_categories` .
+    :arg gdf: The emissions of the (category, substance) columns, used as
+        weights. Only their totals are used when the profiles do not
+        depend on the cell.
+    """
     for profiles_name, profiles_indexes_name in [
         ("v_profiles", "v_profiles_indexes"),
         ("t_profiles_groups", "t_profiles_indexes"),
@@ -342,7 +378,7 @@ def group_categories(
             new_profiles, new_indices = group_profiles_indexes(
                 profiles,
                 profiles_indexes,
-                indexes_weights=get_weights_of_gdf_profiles(inv.gdf, profiles_indexes),
+                indexes_weights=get_weights_of_gdf_profiles(gdf, profiles_indexes),
                 categories_group=categories_group,
                 groupping_dimension="category",
             )
@@ -361,10 +397,6 @@ def group_categories(
                 f"Generated new {profiles_indexes_name} from groupping."
             )
 
-    out_inv.history.append(f"groupped from {inv.categories} to {out_inv.categories}")
-
-    return out_inv
-
 
 def add_inventories(inv: Inventory, other_inv: Inventory) -> Inventory:
     """Add inventories together.
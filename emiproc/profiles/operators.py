@@ -350,9 +350,7 @@ def group_profiles_indexes(
         )
 
     if isinstance(merged_profiles[0], VerticalProfiles):
-        merged_profiles = sum(
-            merged_profiles,
-        )
+        merged_profiles = VerticalProfiles.concat(merged_profiles)
     else:
         merged_profiles = sum(merged_profiles, [])
 
@@ -60,6 +60,22 @@ class VerticalProfiles:
             self.height.copy(),
         )
 
+    @classmethod
+    def concat(cls, profiles: list[VerticalProfiles]) -> VerticalProfiles:
+        """Concatenate many profiles with the same heights.
+
+        This copies the ratios only once, which is prefered over
+        `sum(profiles)` that copies them at each addition.
+        """
+        profiles = list(profiles)
+        height = profiles[0].height
+        for p in profiles[1:]:
+            assert np.allclose(p.height, height)
+        return cls(
+            ratios=np.concatenate([p.ratios for p in profiles], axis=0),
+            height=height.copy(),
+        )
+
     def __add__(self, other: VerticalProfiles):
         if isinstance(other, int) and other == 0:
             # Useful for call in sum()
@@ -93,19 +109,17 @@ class GroupingMethod(Enum):
 
 def get_mid_heights(max_heights: np.ndarray) -> np.ndarray:
     """Get the mid position of the height based on emiproc convention for height levels."""
-    min_height = np.roll(max_heights, 1)
+    max_heights = np.asarray(max_heights)
+    mid_heights = max_heights / 2
     # First level start at 0
-    min_height[0] = 0
-    mid_heights = (max_heights + min_height) / 2
+    mid_heights[1:] += max_heights[:-1] / 2
     return mid_heights
 
 
 def get_delta_h(max_heights: np.ndarray) -> np.ndarray:
     """Get height coverd by each level based on emiproc convention for height levels.."""
-    min_height = np.roll(max_heights, 1)
     # First level start at 0
-    min_height[0] = 0
-    return max_heights - min_height
+    return np.diff(max_heights, prepend=0)
 
 
 def get_weights_profiles_interpolation(
@@ -119,33 +133,23 @@ def get_weights_profiles_interpolation(
     It is assumed that they are vertical profiles from emiproc convention
     """
 
-    # Initialize parameters for the algorithm
-    i, j = 0, 0
-    last = 0.0
-
-    diff = np.zeros((len(to_p), len(from_p)))
-
-    while i < len(from_p) and j < len(to_p):
-        # Will check the distance with the last point
-        # and will input it in the diff matrix
-        f = from_p[i]
-        t = to_p[j]
-        if f <= t:
-            diff[j, i] = f - last
-            i += 1
-            last = f
-        else:
-            diff[j, i] = t - last
-            j += 1
-            last = t
-
-    if j == len(to_p):
-        # Assing the last ones to the last line
-        while i < len(from_p):
-            f = from_p[i]
-            diff[-1, i] += f - last
-            i += 1
-            last = f
+    from_p = np.asarray(from_p, dtype=float)
+    to_p = np.asarray(to_p, dtype=float)
+
+    # Bounds of the layers, the first layer starts at the ground
+    from_bot = np.concatenate([[0.0], from_p[:-1]])
+    to_bot = np.concatenate([[0.0], to_p[:-1]])
+    to_top = to_p.copy()
+    # What is above the top of the last layer is assigned to the last layer
+    to_top[-1] = np.inf
+
+    # Overlap of each layer of from_p (columns) with each of to_p (lines)
+    diff = np.clip(
+        np.minimum(from_p, to_top[:, np.newaxis])
+        - np.maximum(from_bot, to_bot[:, np.newaxis]),
+        0.0,
+        None,
+    )
 
     # Weights is the noramlized
     return diff / diff.sum(axis=0)
@@ -180,9 +184,16 @@ def resample_vertical_profiles(
 
 
     out_ratios = []
+    # Profiles often share the same heights, compute their weights only once
+    weights_of_heights = {}
     for p in profiles:
         # Get the weights for remapping those profiles
-        weights = get_weights_profiles_interpolation(p.height, levels)
+        key = tuple(np.asarray(p.height, dtype=float))
+        if key not in weights_of_heights:
+            weights_of_heights[key] = get_weights_profiles_interpolation(
+                p.height, levels
+            )
+        weights = weights_of_heights[key]
 
         # Do the remapping and add it to the results
         out_ratios.append(p.ratios.dot(weights.T))
@@ -212,7 +223,7 @@ def check_valid_vertical_profile(vertical_profile: VerticalProfile | VerticalPro
     assert np.all(~np.isnan(r)) and np.all(~np.isnan(h)), "Cannot contain nan values"
 
     assert np.all(h > 0)
-    assert np.all(h[1:] > np.roll(h, 1)[1:]), "height must be increasing"
+    assert np.all(np.diff(h) > 0), "height must be increasing"
     if isinstance(vertical_profile, VerticalProfile):
         assert np.sum(r) == 1.0
         assert len(r) == len(h)
@@ -1,10 +1,14 @@
 """Different functions for doing the weights remapping."""
 from __future__ import annotations
+import hashlib
 import logging
 from pathlib import Path
 from warnings import warn
 import numpy as np
+import pandas as pd
 import geopandas as gpd
+import pyproj
+import shapely
 from typing import TYPE_CHECKING, Iterable
 from shapely.geometry import Point, MultiPolygon, Polygon
 from emiproc.utilities import ProgressIndicator
@@ -19,6 +23,32 @@ if TYPE_CHECKING:
     from emiproc.inventories import Inventory
 
 
+def shapes_fingerprint(shapes: Iterable[Polygon | Point]) -> str:
+    """Return a fingerprint of the shapes, used to identify cached weights.
+
+    It is computed from the number of shapes, the crs, the total bounds
+    and the bounds of a sample of the shapes, such that it is fast
+    even for large grids.
+    """
+    if isinstance(shapes, gpd.GeoDataFrame):
+        shapes = shapes.geometry
+    elif not isinstance(shapes, gpd.GeoSeries):
+        shapes = gpd.GeoSeries(shapes)
+
+    n_shapes = len(shapes)
+    sample = np.unique(
+        np.linspace(0, n_shapes - 1, num=min(n_shapes, 1000), dtype=int)
+    )
+
+    hasher = hashlib.sha1()
+    hasher.update(str(n_shapes).encode())
+    hasher.update(str(shapes.crs).encode())
+    hasher.update(np.asarray(shapes.total_bounds, dtype=float).tobytes())
+    hasher.update(shapes.iloc[sample].bounds.to_numpy(dtype=float).tobytes())
+
+    return hasher.hexdigest()
+
+
 def get_weights_mapping(
     weights_filepath: Path | None,
     shapes_inv: Iterable[Polygon | Point],
@@ -36,6 +66,9 @@ def get_weights_mapping(
         weights data. Emiproc will add some metadata to it.
         This file has to be a npz archive ending with suffix .npz .
         Emiproc will add the suffix if you don't.
+        A fingerprint of the shapes is saved with the weights.
+        If the shapes do not match the fingerprint, the weights are
+        recomputed and the file is overwritten.
     :arg shapes_inv: The shapes of the inventory.
         Shapes from which the remapping will be done.
     :arg shapes_out: The shapes to which the remapping will be done.
@@ -66,7 +99,25 @@ def get_weights_mapping(
                 weights_filepath.stem + "_loopinv"
             )
 
-    if (weights_filepath is None) or (not weights_filepath.exists()):
+    w_mapping = None
+    if weights_filepath is not None:
+        fingerprint = "_".join(
+            [shapes_fingerprint(shapes_inv), shapes_fingerprint(shapes_out)]
+        )
+        if weights_filepath.exists():
+            # Plain arrays only, no pickled objects are allowed in the file
+            with np.load(weights_filepath, allow_pickle=False) as weights_file:
+                w_mapping = {**weights_file}
+            # Files saved before the fingerprints were added are trusted
+            cached_fingerprint = w_mapping.pop("fingerprint", fingerprint)
+            if cached_fingerprint != fingerprint:
+                logger.warning(
+                    f"Weights in {weights_filepath} were computed for other "
+                    "shapes, they will be recomputed."
+                )
+                w_mapping = None
+
+    if w_mapping is None:
         w_mapping = calculate_weights_mapping(
             shapes_inv,
             shapes_out,
@@ -76,11 +127,8 @@ def get_weights_mapping(
         if weights_filepath is not None:
             # Make sure dir is created
             weights_filepath.parent.mkdir(exist_ok=True, parents=True)
-            np.savez(weights_filepath, **w_mapping)
+            np.savez(weights_filepath, **w_mapping, fingerprint=fingerprint)
 
-    else:
-        w_mapping = {**np.load(weights_filepath)}
-        
     return w_mapping
 
 
@@ -209,38 +257,57 @@ def calculate_weights_mapping(
 
     elif method == "new":
 
-        # Merge the two geometries using intersections
-        gdf_in = gpd.GeoDataFrame(geometry=shapes_vect)
-        gdf_out = gpd.GeoDataFrame(geometry=shapes_looped)
-        gdf_weights = gdf_in.sjoin(gdf_out, rsuffix='out')
-        gdf_weights = gdf_weights.merge(gdf_out, left_on="index_out", right_index=True, suffixes=("", "_out"))
-        gdf_weights.index.name = 'index_inv'
-        gdf_weights = gdf_weights.assign(geometry_inter=lambda d: (d["geometry"].intersection(gpd.GeoSeries(d["geometry_out"]))))
+        # Find the pairs of intersecting shapes with a tree on the looped shapes,
+        # this filters on the bounding boxes before testing the geometries
+        geoms_vect = shapes_vect.to_numpy()
+        geoms_looped = shapes_looped.to_numpy()
+        tree = shapely.STRtree(geoms_looped)
+        vect_pos, looped_pos = tree.query(geoms_vect, predicate="intersects")
+        geometry = geoms_vect[vect_pos]
+        geometry_out = geoms_looped[looped_pos]
+        area_inv = shapely.area(geometry)
+        area_out = shapely.area(geometry_out)
+
+        # When a shape is inside the other, the intersection is the shape itself
+        # and the expensive computation of the intersection can be skipped
+        inv_inside = shapely.within(geometry, geometry_out)
+        out_inside = ~inv_inside & shapely.contains(geometry, geometry_out)
+        overlapping = ~(inv_inside | out_inside)
+        area_inter = np.where(inv_inside, area_inv, area_out)
+        area_inter[overlapping] = shapely.area(
+            shapely.intersection(geometry[overlapping], geometry_out[overlapping])
+        )
 
-        if loop_over_inv_objects:
-            # Calculate weights for polygons
-            gdf_weights["weights"] = gdf_weights.geometry_inter.area / gdf_weights.geometry_out.area
+        # Labels of the shapes in the input series
+        index_vect = shapes_vect.index.to_numpy()[vect_pos]
+        index_looped = shapes_looped.index.to_numpy()[looped_pos]
 
-            # Process the points
-            gdf_points =  gdf_weights.loc[gdf_weights.geometry_out.type == 'Point']
-            if gdf_points.shape[0]:
-                nareas_points = gdf_points.groupby('index_out').transform(np.count_nonzero)['geometry']
-                gdf_weights.loc[gdf_weights.geometry_out.type == 'Point', 'weights'] = 1 / nareas_points
+        if loop_over_inv_objects:
+            # Calculate weights for polygons, points get their weights below
+            with np.errstate(divide="ignore", invalid="ignore"):
+                weights = area_inter / area_out
+
+            # Points are split equally among the cells they touch
+            is_point = shapely.get_type_id(geometry_out) == shapely.GeometryType.POINT
+            if np.any(is_point):
+                _, inverse, counts = np.unique(
+                    index_looped[is_point], return_inverse=True, return_counts=True
+                )
+                weights[is_point] = 1 / counts[inverse]
 
             # Extract indices
-            gdf_weights = gdf_weights.sort_values(by=['index_inv', 'index_out'])
-            w_mapping["inv_indexes"] = gdf_weights.index_out.to_numpy()
-            w_mapping["output_indexes"] = gdf_weights.index.to_numpy()
-
+            order = np.lexsort((index_looped, index_vect))
+            w_mapping["inv_indexes"] = index_looped[order]
+            w_mapping["output_indexes"] = index_vect[order]
 
         else:
             # Calculate weights and extract indices
-            gdf_weights["weights"] = gdf_weights.geometry_inter.area / gdf_weights.geometry.area
-            gdf_weights = gdf_weights.sort_values(by=['index_out', 'index_inv'])
-            w_mapping["inv_indexes"] = gdf_weights.index.to_numpy()
-            w_mapping["output_indexes"] = gdf_weights.index_out.to_numpy()
+            weights = area_inter / area_inv
+            order = np.lexsort((index_vect, index_looped))
+            w_mapping["inv_indexes"] = index_vect[order]
+            w_mapping["output_indexes"] = index_looped[order]
 
-        w_mapping["weights"] = gdf_weights.weights.to_numpy()
+        w_mapping["weights"] = weights[order]
 
     else:
         raise ValueError(f"'method' must be one of ['new', 'old'] not {method}.")
@@ -366,6 +433,7 @@ def remap_inventory(
     grid: Grid | gpd.GeoSeries,
     weigths_file: PathLike | None = None,
     method: str = "new",
+    compose_with: dict[str, list[str]] | None = None,
 ) -> Inventory:
     """Remap any inventory on the desired grid.
 
@@ -375,12 +443,24 @@ def remap_inventory(
     :arg inv: The inventory from which to remap.
     :arg grid: The grid to remap to.
     :arg weigths_file: The file storing the weights.
+    :arg compose_with: Optional mapping of groups of categories, as for
+        :py:func:`emiproc.inventories.utils.group_categories` .
+        The groupping is composed with the remapping, such that the weights
+        are only applied to the groups.
+        The result is the same as groupping the remapped inventory.
 
     .. warning::
 
         To make sure the grid is defined on the same crs as the inventory,
         this funciton will call geopandas.to_crs to the grid geometries.
 
+    .. note::
+
+        The weights are computed from the areas of the shapes, so
+        the inventory should be on a projected crs, for example
+        :py:data:`emiproc.grids.WGS84_PROJECTED` .
+        Convert it once with :py:meth:`Inventory.to_crs` before remapping.
+
 
 
     """
@@ -396,6 +476,12 @@ def remap_inventory(
 
     # Treat possible issues with crs not matching
     if inv.crs is not None:
+        if pyproj.CRS(inv.crs).is_geographic:
+            logger.warning(
+                f"The inventory {inv.name} is on a geographic crs ({inv.crs}). "
+                "The shapes areas used for the weights are then not in m2. "
+                "Use `inv.to_crs(WGS84_PROJECTED)` before remapping."
+            )
         if grid_cells.crs != inv.crs:
             # convert the grid cells to the correct crs
             grid_cells = grid_cells.to_crs(inv.crs)
@@ -406,6 +492,19 @@ def remap_inventory(
                 "Assign a crs to the inventory before remapping."
             )
 
+    if compose_with is not None:
+        # Imported here, as the inventories utils depend on this module
+        from emiproc.inventories.utils import group_gdf_profiles, validate_group
+
+        validate_group(compose_with, inv.categories)
+        group_of = {
+            cat: group
+            for group, categories in compose_with.items()
+            for cat in categories
+        }
+        # Total emissions of the categories on the grid, to weight the profiles
+        totals = {}
+
     if inv.gdf is not None:
         # Remap the main data
         w_mapping = get_weights_mapping(
@@ -420,12 +519,32 @@ def remap_inventory(
             (w_mapping["weights"], (w_mapping["output_indexes"], w_mapping["inv_indexes"])),
             shape=(len(grid_cells), len(inv.gdf)),
             dtype=float,
-        )
-        # Perform the remapping on each column
-        mapping_dict = {
-            key: weights_remap_matrix(w_matrix, inv.gdf[key])
-            for key in inv._gdf_columns
-        }
+        ).tocsr()
+        columns = inv._gdf_columns
+        values = inv.gdf[columns].to_numpy(dtype=float)
+        if compose_with is None:
+            # Remap all the columns with a single product on the raw values
+            remapped_columns = w_matrix @ values
+            mapping_dict = dict(zip(columns, remapped_columns.T))
+        else:
+            # Sparse (n_groups, n_columns) matrix of which column goes in which group
+            groups = list(dict.fromkeys((group_of[cat], sub) for cat, sub in columns))
+            group_index = {group: i for i, group in enumerate(groups)}
+            grouping_matrix = coo_array(
+                (
+                    np.ones(len(columns)),
+                    (
+                        [group_index[(group_of[cat], sub)] for cat, sub in columns],
+                        np.arange(len(columns)),
+                    ),
+                ),
+                shape=(len(groups), len(columns)),
+            ).tocsr()
+            # Sum the columns of the groups first, such that the weights
+            # are applied to the groups only
+            remapped_groups = w_matrix @ (grouping_matrix @ values.T).T
+            mapping_dict = dict(zip(groups, remapped_groups.T))
+            totals.update(zip(columns, w_matrix.sum(axis=0) @ values))
     else:
         mapping_dict = {}
 
@@ -443,17 +562,40 @@ def remap_inventory(
             loop_over_inv_objects=True,
             method=method,
         )
+        # The matrix is built once and applied to all the substances at once
+        w_matrix = coo_array(
+            (w_mapping["weights"], (w_mapping["output_indexes"], w_mapping["inv_indexes"])),
+            shape=(len(grid_cells), len(gdf)),
+            dtype=float,
+        ).tocsr()
+        substances = [
+            sub
+            for sub in gdf.columns
+            # Skip the geometric columns
+            if not isinstance(gdf[sub].dtype, gpd.array.GeometryDtype)
+        ]
+        values = gdf[substances].to_numpy(dtype=float)
+        remapped_subs = w_matrix @ values
+        if compose_with is None:
+            out_category = category
+        else:
+            out_category = group_of[category]
+            for sub, total in zip(substances, w_matrix.sum(axis=0) @ values):
+                totals[(category, sub)] = totals.get((category, sub), 0) + total
         # Remap each substance
-        for sub in gdf.columns:
-            if isinstance(gdf[sub].dtype, gpd.array.GeometryDtype):
-                continue  # Geometric column
-            remapped = weights_remap(w_mapping, gdf[sub], len(grid_cells))
-            if (category, sub) not in mapping_dict:
+        for sub, remapped in zip(substances, remapped_subs.T):
+            if (out_category, sub) not in mapping_dict:
                 # Create new entry
-                mapping_dict[(category, sub)] = remapped
+                mapping_dict[(out_category, sub)] = remapped
             else:
                 # Add it to the category
-                mapping_dict[(category, sub)] += remapped
+                mapping_dict[(out_category, sub)] += remapped
+
+    if compose_with is not None:
+        # Only keep the groups with some non zero value, as group_categories
+        mapping_dict = {
+            key: remapped for key, remapped in mapping_dict.items() if np.any(remapped)
+        }
 
     # Create the output inv
     out_inv = inv.copy(
@@ -469,4 +611,15 @@ def remap_inventory(
     out_inv.gdfs = {}
     out_inv.history.append(f"Remapped to grid {grid}")
 
+    if compose_with is not None:
+        group_gdf_profiles(
+            inv,
+            out_inv,
+            compose_with,
+            pd.DataFrame({key: [total] for key, total in totals.items()}),
+        )
+        out_inv.history.append(
+            f"groupped from {inv.categories} to {out_inv.categories}"
+        )
+
     return out_inv
@@ -63,6 +63,24 @@ def grid_polygon_intersects(
     return out
 
 
+def get_bounds_mask(centers: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """Return a mask of the cells of a regular axis overlapping [vmin, vmax].
+
+    Cells which only touch the bounds are not kept, such that round
+    bounds on the cell edges give round numbers of cells.
+
+    :arg centers: The centers of the cells along the axis (increasing
+        or decreasing).
+    :arg vmin: The lower bound.
+    :arg vmax: The upper bound.
+    """
+    centers = np.asarray(centers)
+    half_width = np.abs(np.diff(centers)).mean() / 2
+    # Tolerance for the floating point errors on the cell edges
+    eps = 1e-6 * half_width
+    return (centers + half_width > vmin + eps) & (centers - half_width < vmax - eps)
+
+
 def get_natural_earth(
     resolution: str = "10m", category: str = "physical", name: str = "coastline"
 ) -> gpd.GeoDataFrame:
@@ -40,5 +40,5 @@ remapped_point = remap_inventory(inv, icon_grid, grid_file.parent / f"remapped_p
 
 
 #%%
-export_icon_oem(remapped_point, grid_file, grid_file.with_stem(f"{grid_file.stem}_with_h2o2_emissions"))
+export_icon_oem(remapped_point, icon_grid, grid_file.with_stem(f"{grid_file.stem}_with_h2o2_emissions"))
 
@@ -138,7 +138,7 @@ from emiproc.exports.icon import export_icon_oem
 
 export_icon_oem(
     inv=combined,
-    icon_grid_file=grid_file,
+    icon_grid_file=icon_grid,
     output_dir=grid_file.parent / f"{grid_file.stem}_zh_ch_tno_combined",
     group_dict=groups,
     substances=["CO2", "CH4", 'NOx'],
@@ -93,6 +93,16 @@ def test_addition_vertical_profiles():
     )
 
 
+def test_concat_vertical_profiles():
+    profiles = vertical_profiles.VerticalProfiles_instance
+    new_profiles = VerticalProfiles.concat([profiles, profiles, profiles])
+
+    assert new_profiles.n_profiles == 3 * profiles.n_profiles
+    assert np.all(new_profiles.ratios == sum([profiles, profiles, profiles]).ratios)
+    # The input profiles are not shared with the new ones
+    assert new_profiles.height is not profiles.height
+
+
 #
 def test_weighted_combination():
     weights = np.array([1, 2, 3])
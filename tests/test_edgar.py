@@ -0,0 +1,31 @@
+"""Test the EDGAR inventory on a small synthetic file."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from emiproc.inventories.edgar import EDGAR_Inventory
+
+
+@pytest.fixture
+def edgar_pattern(tmp_path):
+    """0.1 degree file with longitudes from 0 to 360, as in EDGAR."""
+    lon = np.arange(0.05, 360, 0.1)
+    lat = np.arange(-84.95, -70, 0.1)
+    cat_dir = tmp_path / "CH4" / "ENE"
+    cat_dir.mkdir(parents=True)
+    xr.Dataset(
+        {"emi_ch4": (("lat", "lon"), np.ones((len(lat), len(lon))))},
+        coords={"lon": lon, "lat": lat},
+    ).to_netcdf(cat_dir / "v7.0_FT2021_CH4_2018_ENE.0.1x0.1.nc")
+    return cat_dir / "v7.0_FT2021_CH4_*_ENE.0.1x0.1.nc"
+
+
+def test_bounds(edgar_pattern):
+    inv = EDGAR_Inventory(edgar_pattern, bounds=(-5, -80, 5, -75))
+
+    # Cells only touching the bounds are not included
+    assert inv.grid.nx == 100
+    assert inv.grid.ny == 50
+    assert len(inv.gdf) == inv.grid.nx * inv.grid.ny
+    np.testing.assert_allclose(inv.gdf.total_bounds, [-5, -80, 5, -75])
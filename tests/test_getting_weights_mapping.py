@@ -1,3 +1,4 @@
+import numpy as np
 from shapely.geometry import Polygon
 from emiproc.regrid import get_weights_mapping
 
@@ -13,4 +14,20 @@ def test_get_weights_mapping():
 def test_no_weights():
     get_weights_mapping(
         None, inv.gdf, polys
-        )
\ No newline at end of file
+        )
+
+
+def test_cached_weights_of_other_shapes(tmp_path):
+    weights_file = tmp_path / "weights"
+    w_mapping = get_weights_mapping(weights_file, inv.gdf, polys)
+    # Same shapes: the weights are loaded from the file
+    cached = get_weights_mapping(weights_file, inv.gdf, polys)
+    for key, values in w_mapping.items():
+        assert np.all(cached[key] == values)
+
+    # Other shapes: the weights are recomputed
+    other_polys = [Polygon([(0, 0), (0.5, 0), (0.5, 0.5), (0, 0.5), (0, 0)])]
+    w_mapping_other = get_weights_mapping(weights_file, inv.gdf, other_polys)
+    expected = get_weights_mapping(None, inv.gdf, other_polys)
+    for key, values in expected.items():
+        assert np.all(w_mapping_other[key] == values)
@@ -0,0 +1,35 @@
+"""Test the GFAS inventory on a small synthetic file."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from emiproc.inventories.gfas import GFAS_Inventory
+
+
+@pytest.fixture
+def gfas_file(tmp_path):
+    """Global 0.5 degree file, with latitudes sorted from high to low."""
+    lon = np.arange(0.25, 360, 0.5)
+    lat = np.arange(89.75, -90, -0.5)
+    path = tmp_path / "gfas.nc"
+    xr.Dataset(
+        {
+            "co2fire": (
+                ("time", "latitude", "longitude"),
+                np.ones((2, len(lat), len(lon)), dtype=np.float32),
+            )
+        },
+        coords={"longitude": lon, "latitude": lat, "time": [0, 1]},
+    ).to_netcdf(path)
+    return path
+
+
+def test_bounds(gfas_file):
+    inv = GFAS_Inventory(gfas_file, bounds=(5, 44, 11, 48))
+
+    # Cells only touching the bounds are not included
+    assert inv.grid.nx == 12
+    assert inv.grid.ny == 8
+    assert len(inv.gdf) == inv.grid.nx * inv.grid.ny
+    assert np.all(inv.gdf[("co2fire", "CO2")] > 0)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from emiproc.inventories.utils import group_categories
+from emiproc.tests_utils.test_inventories import inv, inv_with_pnt_sources
+
+
+def test_group_sums():
+    groupped = group_categories(inv, {"ad": ["adf"], "other": ["liku", "test"]})
+
+    assert ("ad", "NH3") not in groupped.gdf
+    assert ("other", "CH4") not in groupped.gdf
+    np.testing.assert_array_equal(groupped.gdf[("ad", "CH4")], inv.gdf[("adf", "CH4")])
+    np.testing.assert_array_equal(
+        groupped.gdf[("other", "NH3")], inv.gdf[("test", "NH3")]
+    )
+    np.testing.assert_array_equal(groupped.gdf[("ad", "CO2")], inv.gdf[("adf", "CO2")])
+    assert groupped.gdf.geometry.equals(inv.gdf.geometry)
+
+
+def test_group_all_in_one():
+    groupped = group_categories(
+        inv_with_pnt_sources, {"all": ["adf", "liku", "test", "blek", "other"]}
+    )
+
+    np.testing.assert_array_equal(
+        groupped.gdf[("all", "CO2")],
+        inv.gdf[("adf", "CO2")] + inv.gdf[("liku", "CO2")],
+    )
+    assert len(groupped.gdfs["all"]) == 7
@@ -0,0 +1,184 @@
+"""Test the helpers of the legacy hourly emissions module."""
+
+import datetime
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+
+from emiproc.hourly_emissions import (
+    country_id_mapping,
+    extract_matrices,
+    extract_metadata,
+    extract_to_grid,
+    process_day,
+)
+
+country_codes = np.array([12, 3, 45, 7])
+grid = np.array([[3, 3, 45], [7, 12, 3]])
+
+
+def test_country_id_mapping():
+    mapping = country_id_mapping(country_codes, grid)
+
+    assert mapping.dtype == np.uint8
+    assert mapping.shape == grid.shape
+    assert np.all(country_codes[mapping] == grid)
+
+
+def test_country_id_mapping_missing_code():
+    with pytest.raises(IndexError):
+        country_id_mapping(country_codes, np.array([[3, 99]]))
+    with pytest.raises(IndexError):
+        country_id_mapping(country_codes, np.array([[3, 5]]))
+
+
+def test_extract_to_grid():
+    country_vals = np.array([0.5, 1.0, 2.0, 4.0])
+    grid_to_index = country_id_mapping(country_codes, grid)
+
+    res = extract_to_grid(grid_to_index, country_vals)
+
+    assert res.dtype == np.float32
+    assert res.shape == grid.shape
+    assert np.all(res == country_vals[grid_to_index])
+
+
+def test_extract_matrices(tmp_path):
+    path = tmp_path / "profiles.nc"
+    with Dataset(path, "w") as ds:
+        ds.createDimension("hour", 24)
+        ds.createDimension("country", 4)
+        for i, name in enumerate(["tp_a", "tp_b", "tp_c"]):
+            var = ds.createVariable(name, "f8", ("hour", "country"))
+            var[:] = np.arange(24 * 4).reshape(24, 4) + 100 * i
+
+    rows, mats = extract_matrices(
+        str(path), [["tp_b", "tp_a"], ["tp_a", "tp_c"]], np.s_[3, :]
+    )
+
+    assert rows == {"tp_b": 0, "tp_a": 1, "tp_c": 2}
+    assert mats.dtype == np.float32
+    assert mats.shape == (3, 4)
+    assert np.all(mats[rows["tp_c"]] == np.arange(12, 16) + 200)
+
+    rows, mats = extract_matrices(str(path), [["tp_a"]], np.s_[3, :], np.max)
+    assert mats[rows["tp_a"]] == 15
+
+
+@pytest.fixture
+def day_inputs(tmp_path):
+    """Small emission and vertical datasets, with the matrices of one day."""
+    rng = np.random.default_rng(42)
+    nlat, nlon, nlevels = 3, 4, 2
+
+    emi_path = tmp_path / "emi.nc"
+    with Dataset(emi_path, "w") as emi:
+        emi.createDimension("rlat", nlat)
+        emi.createDimension("rlon", nlon)
+        emi.createVariable("rlat", "f4", ("rlat",))[:] = np.arange(nlat)
+        emi.createVariable("rlon", "f4", ("rlon",))[:] = np.arange(nlon)
+    ver_path = tmp_path / "ver.nc"
+    with Dataset(ver_path, "w") as ver:
+        ver.createDimension("level", nlevels)
+        ver.createVariable("layer_bot", "f4", ("level",))[:] = [0, 20]
+        ver.createVariable("layer_mid", "f4", ("level",))[:] = [10, 40]
+        ver.createVariable("layer_top", "f4", ("level",))[:] = [20, 60]
+
+    n_cats, n_tps, n_vps = 3, 2, 2
+    matrices = {
+        "emi_mats": rng.random((n_cats, nlat, nlon)).astype(np.float32),
+        "hod_mats": rng.random((24, n_tps, nlat, nlon)).astype(np.float32),
+        "dow_mats": rng.random((n_tps, nlat, nlon)).astype(np.float32),
+        "moy_mats": rng.random((n_tps, nlat, nlon)).astype(np.float32),
+        "ver_mats": rng.random((n_vps, nlevels)).astype(np.float32),
+    }
+    lists = {
+        "variables": ["var_1", "var_2"],
+        "cats": [np.array([0, 1]), np.array([0, 2, 2])],
+        "tps": [np.array([0, 1]), np.array([1, 0, 0])],
+        "vps": [np.array([0, 1]), np.array([1, 1, 1])],
+        "factors": [
+            np.array([1.0, 0.5], dtype=np.float32),
+            np.array([2.0, 1.0, 1.0], dtype=np.float32),
+        ],
+    }
+    metadata = extract_metadata(str(emi_path), str(ver_path))
+
+    return lists, matrices, metadata
+
+
+def expected_emissions(lists, matrices, v, hour):
+    """Naive computation of the emissions of the variable v at the hour."""
+    return sum(
+        factor
+        * matrices["emi_mats"][cat]
+        * matrices["hod_mats"][hour][tp]
+        * matrices["dow_mats"][tp]
+        * matrices["moy_mats"][tp]
+        * matrices["ver_mats"][vp][:, np.newaxis, np.newaxis]
+        for cat, tp, vp, factor in zip(
+            lists["cats"][v],
+            lists["tps"][v],
+            lists["vps"][v],
+            lists["factors"][v],
+        )
+    )
+
+
+def test_process_day(day_inputs, tmp_path):
+    lists, matrices, metadata = day_inputs
+    date = datetime.date(2020, 3, 2)
+    path_template = str(tmp_path / "emis_%Y%m%d%H.nc")
+
+    assert (
+        process_day(date, path_template, lists, matrices, metadata, "cosmo-ghg") == date
+    )
+
+    for hour in [0, 13, 23]:
+        of_path = datetime.datetime.combine(date, datetime.time(hour)).strftime(
+            path_template
+        )
+        with Dataset(of_path) as of:
+            assert np.allclose(of["level"][:], [10, 40])
+            assert np.allclose(of["level_bnds"][:], [[0, 20], [20, 60]])
+            for v, var in enumerate(lists["variables"]):
+                expected = expected_emissions(lists, matrices, v, hour)
+                assert np.allclose(of[var][0, :], expected)
+
+
+def test_process_day_daily_files(day_inputs, tmp_path):
+    lists, matrices, metadata = day_inputs
+    date = datetime.date(2020, 3, 2)
+    path_template = str(tmp_path / "emis_%Y%m%d.nc")
+
+    process_day(
+        date, path_template, lists, matrices, metadata, "cosmo-ghg", daily_files=True
+    )
+
+    with Dataset(date.strftime(path_template)) as of:
+        assert len(of["time"]) == 24
+        assert np.all(np.diff(of["time"][:]) == 3600)
+        for v, var in enumerate(lists["variables"]):
+            assert of[var].shape == (24, 2, 3, 4)
+            for hour in [0, 13, 23]:
+                expected = expected_emissions(lists, matrices, v, hour)
+                assert np.allclose(of[var][hour, :], expected)
+
+
+def test_process_day_variable_without_categories(day_inputs, tmp_path):
+    lists, matrices, metadata = day_inputs
+    lists["variables"].append("var_empty")
+    lists["cats"].append(np.array([], dtype=int))
+    lists["tps"].append(np.array([], dtype=int))
+    lists["vps"].append(np.array([], dtype=int))
+    lists["factors"].append(np.array([], dtype=np.float32))
+    date = datetime.date(2020, 3, 2)
+    path_template = str(tmp_path / "emis_%Y%m%d%H.nc")
+
+    process_day(date, path_template, lists, matrices, metadata, "cosmo-ghg")
+
+    of_path = datetime.datetime.combine(date, datetime.time(5)).strftime(path_template)
+    with Dataset(of_path) as of:
+        assert np.all(of["var_empty"][0, :] == 0)
+        assert np.allclose(of["var_1"][0, :], expected_emissions(lists, matrices, 0, 5))
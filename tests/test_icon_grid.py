@@ -0,0 +1,80 @@
+"""Test the ICON grid on a small grid crossing the antimeridian."""
+
+import os
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+from shapely.geometry import MultiPolygon
+
+from emiproc.grids import ICONGrid
+
+
+@pytest.fixture
+def icon_grid_file(tmp_path):
+    """Regular triangulation of lon in [160, 200], lat in [-10, 10]."""
+    lons = np.arange(160, 201, 5.0)
+    lats = np.arange(-10, 11, 5.0)
+    lon, lat = np.meshgrid(lons, lats, indexing="ij")
+    vlon = (lon.ravel() + 180) % 360 - 180
+    vlat = lat.ravel()
+
+    ny = len(lats)
+    triangles = []
+    for i in range(len(lons) - 1):
+        for j in range(ny - 1):
+            a, b, c, d = (
+                i * ny + j,
+                (i + 1) * ny + j,
+                (i + 1) * ny + j + 1,
+                i * ny + j + 1,
+            )
+            triangles += [(a, b, c), (a, c, d)]
+    # Indices in the grid file start at 1
+    triangles = np.array(triangles) + 1
+
+    path = tmp_path / "icon.nc"
+    with Dataset(path, "w") as ds:
+        ds.createDimension("cell", len(triangles))
+        ds.createDimension("vertex", len(vlon))
+        ds.createDimension("nv", 3)
+        ds.createDimension("ne", 6)
+        clon = vlon[triangles - 1].mean(axis=1)
+        clat = vlat[triangles - 1].mean(axis=1)
+        ds.createVariable("clon", "f8", ("cell",))[:] = np.deg2rad(clon)
+        ds.createVariable("clat", "f8", ("cell",))[:] = np.deg2rad(clat)
+        ds.createVariable("cell_area", "f8", ("cell",))[:] = 1.0
+        ds.createVariable("vlon", "f8", ("vertex",))[:] = np.deg2rad(vlon)
+        ds.createVariable("vlat", "f8", ("vertex",))[:] = np.deg2rad(vlat)
+        ds.createVariable("vertex_of_cell", "i4", ("nv", "cell"))[:] = triangles.T
+        ds.createVariable("cells_of_vertex", "i4", ("ne", "vertex"))[:] = 0
+
+    return path
+
+
+def test_antimeridian_cells(icon_grid_file):
+    grid = ICONGrid(icon_grid_file)
+
+    assert len(grid.gdf) == grid.ncell == 64
+    split = grid.gdf.geometry.apply(lambda geom: isinstance(geom, MultiPolygon))
+    # The cells of the two columns touching the antimeridian are split
+    assert split.sum() == 16
+    minx, _, maxx, _ = grid.gdf.total_bounds
+    assert minx >= -180 and maxx <= 180
+
+
+def test_cached_geometries(icon_grid_file, tmp_path):
+    cache_file = tmp_path / "icon_geometries.npz"
+    grid = ICONGrid(icon_grid_file, cache_file=cache_file)
+    assert cache_file.is_file()
+
+    cached_grid = ICONGrid(icon_grid_file, cache_file=cache_file)
+    assert all(cached_grid.gdf.geom_equals_exact(grid.gdf, tolerance=0))
+
+    # Geometries are computed again if the grid file changed
+    with Dataset(icon_grid_file, "a") as ds:
+        ds["vlat"][:] = ds["vlat"][:] / 2
+    stat = os.stat(icon_grid_file)
+    os.utime(icon_grid_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    changed_grid = ICONGrid(icon_grid_file, cache_file=cache_file)
+    assert np.allclose(changed_grid.gdf.total_bounds[[1, 3]], [-5, 5])
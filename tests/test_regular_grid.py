@@ -1,6 +1,7 @@
 # %%
 import pytest
 import geopandas as gpd
+from shapely.geometry import Polygon
 from emiproc.grids import RegularGrid
 from emiproc.tests_utils.test_grids import regular_grid
 
@@ -39,9 +40,13 @@ def test_creation_fails_not_enough():
     )
 
 def test_polylist():
-    regular_grid.cells_as_polylist
+    polys = regular_grid.cells_as_polylist
 
     # Test how we iterate over the cells in the polygon list
+    assert len(polys) == regular_grid.nx * regular_grid.ny
+    for i, j in [(0, 0), (0, 1), (1, 0), (regular_grid.nx - 1, regular_grid.ny - 1)]:
+        expected = Polygon(zip(*regular_grid.cell_corners(i, j)))
+        assert polys[i * regular_grid.ny + j].equals(expected)
 
 
 def test_area():
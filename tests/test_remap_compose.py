@@ -0,0 +1,54 @@
+"""Test the groupping of the categories composed with the remapping."""
+
+import geopandas as gpd
+import numpy as np
+import xarray as xr
+from shapely.geometry import Polygon
+
+from emiproc.inventories.utils import group_categories
+from emiproc.regrid import remap_inventory
+from emiproc.tests_utils.test_inventories import inv_with_pnt_sources
+from emiproc.tests_utils.vertical_profiles import inv as inv_with_profiles
+
+
+def test_group_composed_with_remap():
+    grid = gpd.GeoSeries(
+        [
+            Polygon(((0, 0), (0, 1), (3, 1), (3, 0))),
+            Polygon(((0, 1), (0, 2), (3, 2), (3, 1))),
+        ]
+    )
+    categories_group = {"ad": ["adf", "blek"], "other": ["liku", "test", "other"]}
+
+    composed = remap_inventory(
+        inv_with_pnt_sources, grid, compose_with=categories_group
+    )
+    expected = group_categories(
+        remap_inventory(inv_with_pnt_sources, grid), categories_group
+    )
+
+    assert sorted(composed._gdf_columns) == sorted(expected._gdf_columns)
+    for col in expected._gdf_columns:
+        np.testing.assert_allclose(composed.gdf[col], expected.gdf[col])
+
+
+def test_group_composed_with_remap_profiles():
+    inv = inv_with_profiles.copy()
+    # Different profiles in the categories, such that they are averaged
+    inv.v_profiles_indexes = xr.DataArray(
+        [[2, 1, 0], [0, 2, 1]],
+        dims=("category", "substance"),
+        coords={
+            "category": ["test_cat", "test_cat2"],
+            "substance": ["CH4", "CO2", "NH3"],
+        },
+    )
+    categories_group = {"all": ["test_cat", "test_cat2", "test_cat3"]}
+    grid = gpd.GeoSeries([Polygon(((0, 0), (0, 2), (2, 2), (2, 0)))])
+
+    composed = remap_inventory(inv, grid, compose_with=categories_group)
+    # The profiles are weighted by the remapped emissions, point sources included
+    expected = group_categories(remap_inventory(inv, grid), categories_group)
+
+    np.testing.assert_allclose(composed.v_profiles.ratios, expected.v_profiles.ratios)
+    xr.testing.assert_equal(composed.v_profiles_indexes, expected.v_profiles_indexes)